@@ -16,6 +16,7 @@
 
         pythonEnv = pkgs.python3.withPackages (ps: with ps; [
           mido
+          numpy
           python-rtmidi
           pytest
         ]);
@@ -22,7 +22,7 @@ class TestMusicEvent(unittest.TestCase):
 
         event = MusicEvent('note', [60], 1.0, 0.0, 1)
         self.assertEqual(event.type, 'note')
-        self.assertEqual(event.pitches, [60])
+        self.assertEqual(list(event.pitches), [60])
         self.assertEqual(event.duration, 1.0)
         self.assertEqual(event.offset, 0.0)
         self.assertEqual(event.measure, 1)
@@ -38,6 +38,20 @@ class TestMusicEvent(unittest.TestCase):
         self.assertIn(64, event.pitches)
         self.assertIn(67, event.pitches)
 
+    def test_repeated_content_is_shared(self):
+        """Events with the same pitches share pitches/mask/display objects"""
+        from validator_progression import MusicEvent
+
+        first = MusicEvent('chord', [60, 64, 67], 1.0, 0.0, 1)
+        later = MusicEvent('chord', [60, 64, 67], 2.0, 8.0, 3)
+
+        self.assertIs(first.pitches, later.pitches)
+        self.assertIs(first.display, later.display)
+        self.assertEqual(first.pitch_mask, later.pitch_mask)
+        # Timing fields stay per-occurrence
+        self.assertNotEqual(first.offset, later.offset)
+        self.assertNotEqual(first.duration, later.duration)
+
 
 class TestMidiToFrench(unittest.TestCase):
     """Test MIDI to French note name conversion"""
@@ -187,18 +201,14 @@ class TestShouldNoteBeHeld(unittest.TestCase):
             MusicEvent('note', [62], 1.0, 1.0, 1),  # Short D4 note (1 beat) starting at beat 1
         ]
 
-        # Make events available globally for the function
-        import validator_progression
-        validator_progression.events = events
-
         # Check if C4 (pitch 60) should be held when we're at event 1 (the D4)
         # The C4 starts at offset 0 and lasts 4 beats, so it should still be held at offset 1
-        self.assertTrue(should_note_be_held(60, 1))
+        self.assertTrue(should_note_be_held(60, 1, events))
 
         # Check that D4 (pitch 62) should not be held (it hasn't started yet)
         # Actually, at index 1, we're ON the D4, so this test needs adjustment
         # Let's test a note that definitely shouldn't be held
-        self.assertFalse(should_note_be_held(64, 1))  # E4 never played
+        self.assertFalse(should_note_be_held(64, 1, events))  # E4 never played
 
     def test_note_should_not_be_held_after_duration(self):
         """Test that notes are not required to be held after their duration"""
@@ -210,16 +220,12 @@ class TestShouldNoteBeHeld(unittest.TestCase):
             MusicEvent('note', [62], 1.0, 2.0, 1),  # D4 note starting at beat 2
         ]
 
-        import validator_progression
-        validator_progression.events = events
-
         # At event 1 (D4 at offset 2), the C4 (which ended at offset 1) should not need to be held
-        self.assertFalse(should_note_be_held(60, 1))
+        self.assertFalse(should_note_be_held(60, 1, events))
 
     def test_same_pitch_multiple_times_most_recent_checked(self):
         """Test that only the most recent occurrence of a pitch is checked"""
         from validator_progression import MusicEvent, should_note_be_held
-        import validator_progression
 
         # Create events with the same pitch appearing twice
         events = [
@@ -229,59 +235,48 @@ class TestShouldNoteBeHeld(unittest.TestCase):
             MusicEvent('note', [64], 1.0, 7.0, 2),   # E4: offset 7, duration 1, ends at 8
         ]
 
-        validator_progression.events = events
-
         # At event 3 (E4 at offset 7):
         # - First C4 ended at offset 1 (no overlap with offset 7)
         # - Second C4 ended at offset 6 (no overlap with offset 7)
         # - So C4 should NOT need to be held (most recent occurrence should be checked)
-        result = should_note_be_held(60, 3)
+        result = should_note_be_held(60, 3, events)
         self.assertFalse(result, "C4 should not need to be held at event 3 - most recent occurrence ended at offset 6")
 
     def test_most_recent_pitch_overlaps(self):
         """Test that a note should be held when the most recent occurrence overlaps"""
         from validator_progression import MusicEvent, should_note_be_held
-        import validator_progression
-
         events = [
             MusicEvent('note', [60], 1.0, 0.0, 1),   # C4: offset 0, duration 1, ends at 1
             MusicEvent('note', [60], 4.0, 2.0, 1),   # C4 again: offset 2, duration 4, ends at 6
             MusicEvent('note', [64], 1.0, 4.0, 1),   # E4: offset 4, duration 1, ends at 5
         ]
 
-        validator_progression.events = events
-
         # At event 2 (E4 at offset 4):
         # - First C4 ended at offset 1 (no overlap)
         # - Second C4 ends at offset 6 (OVERLAPS with offset 4)
         # - So C4 SHOULD need to be held (checking most recent occurrence)
-        result = should_note_be_held(60, 2)
+        result = should_note_be_held(60, 2, events)
         self.assertTrue(result, "C4 should need to be held at event 2 - most recent occurrence ends at offset 6")
 
     def test_note_in_chord_should_be_held(self):
         """Test that notes in chords are properly tracked for held note detection"""
         from validator_progression import MusicEvent, should_note_be_held
-        import validator_progression
-
         events = [
             MusicEvent('chord', [60, 64, 67], 3.0, 0.0, 1),  # C major chord: offset 0, duration 3, ends at 3
             MusicEvent('note', [69], 1.0, 1.0, 1),           # A4: offset 1, duration 1, ends at 2
         ]
 
-        validator_progression.events = events
-
         # At event 1 (A4 at offset 1):
         # - The chord (with C4, E4, G4) ends at offset 3
         # - Current event is at offset 1
         # - So all chord notes should be held
-        self.assertTrue(should_note_be_held(60, 1), "C4 from chord should be held")
-        self.assertTrue(should_note_be_held(64, 1), "E4 from chord should be held")
-        self.assertTrue(should_note_be_held(67, 1), "G4 from chord should be held")
+        self.assertTrue(should_note_be_held(60, 1, events), "C4 from chord should be held")
+        self.assertTrue(should_note_be_held(64, 1, events), "E4 from chord should be held")
+        self.assertTrue(should_note_be_held(67, 1, events), "G4 from chord should be held")
 
     def test_simultaneous_notes_different_durations(self):
         """Test that simultaneous notes with different durations don't warn about each other"""
         from validator_progression import MusicEvent, should_note_be_held
-        import validator_progression
 
         # This represents the same note played in two voices with different durations
         # Common in piano music notation
@@ -291,30 +286,44 @@ class TestShouldNoteBeHeld(unittest.TestCase):
             MusicEvent('note', [64], 0.5, 0.5, 1),   # E4: offset 0.5, duration 0.5, ends at 1.0
         ]
 
-        validator_progression.events = events
-
         # Event 1 (Ré4 at offset 0) should NOT warn about event 0 (also Ré4 at offset 0)
         # They start at the same time - the user presses the key once
-        self.assertFalse(should_note_be_held(62, 1), "Simultaneous notes shouldn't require holding")
+        self.assertFalse(should_note_be_held(62, 1, events), "Simultaneous notes shouldn't require holding")
 
         # Event 2 (E4 at offset 0.5) SHOULD warn about Ré4 from event 1 (ends at 1.0)
-        self.assertTrue(should_note_be_held(62, 2), "Ré4 should still be held at event 2")
+        self.assertTrue(should_note_be_held(62, 2, events), "Ré4 should still be held at event 2")
 
     def test_notes_ending_exactly_when_next_starts(self):
         """Test that notes ending exactly when next note starts don't cause false warnings"""
         from validator_progression import MusicEvent, should_note_be_held
-        import validator_progression
-
         events = [
             MusicEvent('note', [60], 1.0, 0.0, 1),   # C4: offset 0, duration 1, ends at 1
             MusicEvent('note', [62], 1.0, 1.0, 1),   # D4: offset 1, duration 1, ends at 2
         ]
 
-        validator_progression.events = events
-
         # Event 1 (D4 at offset 1) should NOT warn about C4 (which ends exactly at offset 1)
         # Using floating point tolerance to handle rounding errors
-        self.assertFalse(should_note_be_held(60, 1), "Notes ending exactly when next starts shouldn't require holding")
+        self.assertFalse(should_note_be_held(60, 1, events), "Notes ending exactly when next starts shouldn't require holding")
+
+
+class TestComputeHeldMasks(unittest.TestCase):
+    """Test the compute_held_masks sweep"""
+
+    def test_masks_match_should_note_be_held(self):
+        """The precomputed masks encode the same answers as should_note_be_held"""
+        from validator_progression import MusicEvent, compute_held_masks
+
+        events = [
+            MusicEvent('note', [60], 4.0, 0.0, 1),   # C4 held through beat 1
+            MusicEvent('note', [62], 1.0, 1.0, 1),   # D4 at beat 1
+            MusicEvent('note', [64], 1.0, 5.0, 2),   # E4 after C4 has ended
+        ]
+        masks = compute_held_masks(events)
+
+        self.assertEqual(masks[0], 0, "Nothing precedes the first event")
+        self.assertTrue((masks[1] >> 60) & 1, "C4 still sounds at beat 1")
+        self.assertFalse((masks[2] >> 60) & 1, "C4 has ended by beat 5")
+        self.assertFalse((masks[2] >> 62) & 1, "D4 has ended by beat 5")
 
 
 class TestFormatEvent(unittest.TestCase):
@@ -346,53 +355,76 @@ class TestCheckEventCompleted(unittest.TestCase):
     def test_single_note_completed(self):
         """Test checking if a single note is completed"""
         from validator_progression import MusicEvent, check_event_completed
-        import validator_progression
 
         event = MusicEvent('note', [60], 1.0, 0.0, 1)
 
         # Note not pressed yet
-        validator_progression.currently_pressed = set()
-        self.assertFalse(check_event_completed(event))
+        self.assertFalse(check_event_completed(event, 0))
 
         # Note is pressed
-        validator_progression.currently_pressed = {60}
-        self.assertTrue(check_event_completed(event))
+        self.assertTrue(check_event_completed(event, 1 << 60))
 
     def test_chord_completed(self):
         """Test checking if a chord is completed"""
         from validator_progression import MusicEvent, check_event_completed
-        import validator_progression
 
         event = MusicEvent('chord', [60, 64, 67], 1.0, 0.0, 1)
 
         # No notes pressed
-        validator_progression.currently_pressed = set()
-        self.assertFalse(check_event_completed(event))
+        self.assertFalse(check_event_completed(event, 0))
 
         # Only one note pressed
-        validator_progression.currently_pressed = {60}
-        self.assertFalse(check_event_completed(event))
+        self.assertFalse(check_event_completed(event, 1 << 60))
 
         # Two notes pressed
-        validator_progression.currently_pressed = {60, 64}
-        self.assertFalse(check_event_completed(event))
+        self.assertFalse(check_event_completed(event, (1 << 60) | (1 << 64)))
 
         # All three notes pressed
-        validator_progression.currently_pressed = {60, 64, 67}
-        self.assertTrue(check_event_completed(event))
+        self.assertTrue(check_event_completed(event, (1 << 60) | (1 << 64) | (1 << 67)))
 
         # All three notes plus extra notes pressed
-        validator_progression.currently_pressed = {60, 64, 67, 69}
-        self.assertTrue(check_event_completed(event))
+        self.assertTrue(check_event_completed(event, (1 << 60) | (1 << 64) | (1 << 67) | (1 << 69)))
 
 
 class TestJumpToBar(unittest.TestCase):
     """Test the jump to bar functionality"""
 
+    def test_build_measure_index(self):
+        """The index maps each measure to its first event"""
+        from validator_progression import MusicEvent, build_measure_index
+
+        events = [
+            MusicEvent('note', [60], 1.0, 0.0, 1),   # Measure 1
+            MusicEvent('note', [62], 1.0, 1.0, 1),   # Measure 1
+            MusicEvent('note', [64], 1.0, 2.0, 2),   # Measure 2
+            MusicEvent('note', [67], 1.0, 4.0, 3),   # Measure 3
+        ]
+        index = build_measure_index(events)
+
+        self.assertEqual(index, {1: 0, 2: 2, 3: 3})
+        self.assertIsNone(index.get(5), "Unknown measures miss the index")
+
+    def test_pitch_measure_index(self):
+        """The per-pitch bitmap records the measures where a pitch appears"""
+        from validator_progression import (MusicEvent,
+                                           build_pitch_measure_index,
+                                           measures_for_pitch)
+
+        events = [
+            MusicEvent('note', [60], 1.0, 0.0, 1),        # C4 in measure 1
+            MusicEvent('chord', [60, 64], 1.0, 2.0, 2),   # C4+E4 in measure 2
+            MusicEvent('note', [60], 1.0, 4.0, 3),        # C4 in measure 3
+        ]
+        index = build_pitch_measure_index(events)
+
+        self.assertEqual(measures_for_pitch(60, index), [1, 2, 3])
+        self.assertEqual(measures_for_pitch(64, index), [2])
+        self.assertEqual(measures_for_pitch(67, index), [],
+                         "A pitch never played maps to no measures")
+
     def test_find_first_event_in_bar(self):
         """Test finding the first event in a specific measure"""
         from validator_progression import MusicEvent
-        import validator_progression
 
         # Create events across multiple measures
         events = [
@@ -403,8 +435,6 @@ class TestJumpToBar(unittest.TestCase):
             MusicEvent('note', [67], 1.0, 4.0, 3),   # Measure 3
         ]
 
-        validator_progression.events = events
-
         # Test finding first event in measure 2
         target_bar = 2
         found_idx = None
@@ -420,15 +450,11 @@ class TestJumpToBar(unittest.TestCase):
     def test_jump_to_nonexistent_bar(self):
         """Test handling of jump to a bar that doesn't exist"""
         from validator_progression import MusicEvent
-        import validator_progression
-
         events = [
             MusicEvent('note', [60], 1.0, 0.0, 1),
             MusicEvent('note', [62], 1.0, 1.0, 2),
         ]
 
-        validator_progression.events = events
-
         # Try to find measure 5 (doesn't exist)
         target_bar = 5
         found = False
@@ -541,7 +567,7 @@ class TestMergeEvents(unittest.TestCase):
 
         self.assertEqual(len(result), 1)
         self.assertEqual(result[0].type, 'note')
-        self.assertEqual(result[0].pitches, [60])
+        self.assertEqual(list(result[0].pitches), [60])
         self.assertEqual(result[0].duration, 1.0)
 
     def test_two_notes_at_different_offsets_kept_separate(self):
@@ -555,8 +581,8 @@ class TestMergeEvents(unittest.TestCase):
         result = merge_events(events)
 
         self.assertEqual(len(result), 2)
-        self.assertEqual(result[0].pitches, [60])
-        self.assertEqual(result[1].pitches, [62])
+        self.assertEqual(list(result[0].pitches), [60])
+        self.assertEqual(list(result[1].pitches), [62])
 
     def test_both_hands_simultaneous_notes_merged_into_chord(self):
         """Notes from left and right hands at the same offset become a single chord event"""
@@ -602,7 +628,7 @@ class TestMergeEvents(unittest.TestCase):
 
         self.assertEqual(len(result), 1)
         self.assertEqual(result[0].type, 'note')
-        self.assertEqual(result[0].pitches, [62])
+        self.assertEqual(list(result[0].pitches), [62])
         self.assertEqual(result[0].duration, 1.0)
 
     def test_mixed_offsets_simultaneous_and_sequential(self):
@@ -642,6 +668,206 @@ class TestMergeEvents(unittest.TestCase):
         self.assertEqual(result[0].measure, 2)
 
 
+class TestBuildEventArrays(unittest.TestCase):
+    """Test the build_event_arrays function"""
+
+    def test_arrays_match_events(self):
+        """The parallel arrays mirror the event attributes in order"""
+        from validator_progression import MusicEvent, build_event_arrays
+
+        events = [
+            MusicEvent('note', [60], 1.0, 0.0, 1),
+            MusicEvent('chord', [62, 65], 2.0, 1.0, 1),
+            MusicEvent('note', [64], 0.5, 3.0, 2),
+        ]
+        offsets, durations, measures = build_event_arrays(events)
+
+        self.assertEqual(len(offsets), 3)
+        self.assertEqual(list(offsets), [0.0, 1.0, 3.0])
+        self.assertEqual(list(durations), [1.0, 2.0, 0.5])
+        self.assertEqual(list(measures), [1, 1, 2])
+
+    def test_empty_events(self):
+        """Empty event lists produce empty arrays"""
+        from validator_progression import build_event_arrays
+
+        offsets, durations, measures = build_event_arrays([])
+        self.assertEqual(len(offsets), 0)
+        self.assertEqual(len(durations), 0)
+        self.assertEqual(len(measures), 0)
+
+
+class TestEventAtTime(unittest.TestCase):
+    """Test the event_at_time binary search"""
+
+    def test_lookup_positions(self):
+        """The active event index is found for arbitrary times"""
+        from validator_progression import MusicEvent, build_event_arrays, event_at_time
+
+        events = [
+            MusicEvent('note', [60], 1.0, 0.0, 1),
+            MusicEvent('note', [62], 1.0, 1.0, 1),
+            MusicEvent('note', [64], 2.0, 2.0, 2),
+        ]
+        offsets, _, _ = build_event_arrays(events)
+
+        self.assertEqual(event_at_time(-0.5, offsets), -1, "Before the first event")
+        self.assertEqual(event_at_time(0.0, offsets), 0, "Exactly on the first event")
+        self.assertEqual(event_at_time(0.5, offsets), 0, "Inside the first event")
+        self.assertEqual(event_at_time(1.0, offsets), 1)
+        self.assertEqual(event_at_time(10.0, offsets), 2, "Past the last event")
+
+
+class TestEventsCache(unittest.TestCase):
+    """Test the extracted-events disk cache"""
+
+    def setUp(self):
+        """Redirect the cache directory into a throwaway location"""
+        import validator_progression
+        self._tmp = tempfile.TemporaryDirectory()
+        self._old_cache_dir = validator_progression.CACHE_DIR
+        validator_progression.CACHE_DIR = os.path.join(self._tmp.name, "cache")
+
+    def tearDown(self):
+        import validator_progression
+        validator_progression.CACHE_DIR = self._old_cache_dir
+        self._tmp.cleanup()
+
+    def test_cache_roundtrip(self):
+        """Saved events are reloaded as long as the score file is unchanged"""
+        from validator_progression import (MusicEvent, save_events_cache,
+                                           load_events_cache,
+                                           _events_cache_path)
+
+        events = [
+            MusicEvent('note', [60], 1.0, 0.0, 1),
+            MusicEvent('chord', [62, 65], 2.0, 1.0, 1),
+        ]
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            xml_path = os.path.join(tmpdir, "score.xml")
+            with open(xml_path, "w") as f:
+                f.write("<score-partwise/>")
+
+            save_events_cache(xml_path, "both", False, events)
+            self.assertTrue(os.path.exists(
+                _events_cache_path(xml_path, "both", False)))
+
+            loaded = load_events_cache(xml_path, "both", False)
+            self.assertIsNotNone(loaded)
+            self.assertEqual(len(loaded), 2)
+            self.assertEqual(loaded[0].type, 'note')
+            self.assertEqual(list(loaded[1].pitches), [62, 65])
+            self.assertEqual(loaded[1].display, "Accord(Ré4 + Fa4)")
+
+    def test_cache_invalidated_by_options_and_content(self):
+        """A cache written for other options or a modified file is rejected"""
+        from validator_progression import (MusicEvent, save_events_cache,
+                                           load_events_cache)
+
+        events = [MusicEvent('note', [60], 1.0, 0.0, 1)]
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            xml_path = os.path.join(tmpdir, "score.xml")
+            with open(xml_path, "w") as f:
+                f.write("<score-partwise/>")
+
+            save_events_cache(xml_path, "both", False, events)
+
+            # Different hand/repeats options miss the cache
+            self.assertIsNone(load_events_cache(xml_path, "left", False))
+            self.assertIsNone(load_events_cache(xml_path, "both", True))
+
+            # Touching the file (different size) invalidates it
+            with open(xml_path, "w") as f:
+                f.write("<score-partwise></score-partwise>")
+            self.assertIsNone(load_events_cache(xml_path, "both", False))
+
+    def test_missing_cache_returns_none(self):
+        """No cache file simply means a miss"""
+        from validator_progression import load_events_cache
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            xml_path = os.path.join(tmpdir, "score.xml")
+            with open(xml_path, "w") as f:
+                f.write("<score-partwise/>")
+            self.assertIsNone(load_events_cache(xml_path, "both", False))
+
+
+class TestParseMusicxmlEvents(unittest.TestCase):
+    """Test the direct (music21-free) MusicXML reader"""
+
+    def test_matches_music21_extraction(self):
+        """The fast reader must produce the same merged events as music21"""
+        from validator_progression import (parse_musicxml_events,
+                                           extract_events, merge_events)
+
+        # Two-hand score with a chord, written out through music21
+        right = stream.Part()
+        right.append(note.Note('C4', quarterLength=1.0))
+        right.append(chord.Chord(['E4', 'G4'], quarterLength=2.0))
+        right.append(note.Note('D4', quarterLength=1.0))
+        left = stream.Part()
+        left.append(note.Note('C3', quarterLength=4.0))
+        score = stream.Score([right, left])
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            xml_path = os.path.join(tmpdir, "score.musicxml")
+            score.write('musicxml', fp=xml_path)
+
+            fast = parse_musicxml_events(xml_path, "both")
+            self.assertIsNotNone(fast)
+            fast_merged = merge_events(fast)
+
+            ref_score = converter.parse(xml_path)
+            ref_merged = merge_events(
+                extract_events(list(ref_score.parts[:2])))
+
+        self.assertEqual(len(fast_merged), len(ref_merged))
+        for got, expected in zip(fast_merged, ref_merged):
+            self.assertEqual(got.type, expected.type)
+            self.assertEqual(sorted(got.pitches), sorted(expected.pitches))
+            self.assertAlmostEqual(float(got.offset), float(expected.offset))
+            self.assertAlmostEqual(float(got.duration),
+                                   float(expected.duration))
+            self.assertEqual(got.measure, expected.measure)
+
+    def test_hand_selection(self):
+        """Only the requested part is read"""
+        from validator_progression import parse_musicxml_events
+
+        right = stream.Part()
+        right.append(note.Note('C5', quarterLength=1.0))
+        left = stream.Part()
+        left.append(note.Note('C2', quarterLength=1.0))
+        score = stream.Score([right, left])
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            xml_path = os.path.join(tmpdir, "score.musicxml")
+            score.write('musicxml', fp=xml_path)
+
+            only_right = parse_musicxml_events(xml_path, "right")
+            only_left = parse_musicxml_events(xml_path, "left")
+
+        self.assertEqual([list(e.pitches) for e in only_right], [[72]])
+        self.assertEqual([list(e.pitches) for e in only_left], [[36]])
+
+    def test_unsupported_file_returns_none(self):
+        """Anything outside the handled subset falls back to music21"""
+        from validator_progression import parse_musicxml_events
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            bad_path = os.path.join(tmpdir, "score.musicxml")
+            with open(bad_path, "w") as f:
+                f.write("not xml at all")
+            self.assertIsNone(parse_musicxml_events(bad_path, "both"))
+
+            empty_path = os.path.join(tmpdir, "empty.musicxml")
+            with open(empty_path, "w") as f:
+                f.write("<score-partwise/>")
+            self.assertIsNone(parse_musicxml_events(empty_path, "both"))
+
+
 class TestMergeEventsRegression(unittest.TestCase):
     """Regression tests for the both-hands merging bug"""
 
@@ -1,17 +1,28 @@
 import argparse
-import select
+import hashlib
+import heapq
+import os
+import pickle
+from array import array
+import queue
 import sys
+import threading
 import time
-import mido
-from music21 import converter, note, chord, stream
+import numpy as np
+
+# mido et music21 sont importés dans main() après l'analyse des arguments :
+# leur chargement coûte plusieurs centaines de ms, que --help et les erreurs
+# d'usage n'ont pas à payer (idem pour la collecte des tests).
 
 # Extraction des notes avec informations temporelles
 FRENCH_NOTES = ["Do", "Do#", "Ré", "Ré#", "Mi", "Fa", "Fa#", "Sol", "Sol#", "La", "La#", "Si"]
 
-def midi_to_french(pitch: int) -> str:
-    name = FRENCH_NOTES[pitch % 12]
-    octave = pitch // 12 - 1
-    return f"{name}{octave}"
+# Table précalculée couvrant toute la plage MIDI (0-127) : la conversion
+# devient une simple indexation, sans arithmétique ni formatage par appel.
+FRENCH_BY_MIDI = tuple(f"{FRENCH_NOTES[p % 12]}{p // 12 - 1}" for p in range(128))
+
+# Liaison directe sur l'indexation C du tuple : pas de frame Python par appel.
+midi_to_french = FRENCH_BY_MIDI.__getitem__
 
 # Structure pour représenter un événement musical
 # event_type: 'note' ou 'chord'
@@ -19,12 +30,44 @@ def midi_to_french(pitch: int) -> str:
 # duration: durée en quarter notes
 # offset: position temporelle
 class MusicEvent:
+    # __slots__ évite le __dict__ par instance : un gros score contient des
+    # dizaines de milliers d'événements, donc la mémoire par événement compte.
+    __slots__ = ('type', 'pitches', 'duration', 'offset', 'measure', 'pitch_mask',
+                 'display', 'end')
+
+    # Contenus partagés entre événements de mêmes hauteurs (motifs répétés,
+    # ostinatos) : une pièce répétitive réutilise les mêmes tableaux de
+    # hauteurs, masques et chaînes d'affichage au lieu d'en recréer par
+    # occurrence.
+    _shared_content = {}
+
     def __init__(self, event_type, pitches, duration, offset, measure_num):
         self.type = event_type  # 'note' or 'chord'
-        self.pitches = pitches  # list of MIDI pitches
+        # array('B') : 1 octet non signé par hauteur MIDI (0-127) au lieu d'un
+        # int boxé, stockage contigu, support natif de `in` / itération.
+        self.pitches = array('B', pitches)
         self.duration = duration  # quarterLength
         self.offset = offset  # temporal position
         self.measure = measure_num
+        self.end = offset + duration  # fin de l'événement, précalculée
+        key = (event_type, self.pitches.tobytes())
+        shared = MusicEvent._shared_content.get(key)
+        if shared is not None:
+            self.pitches, self.pitch_mask, self.display = shared
+            return
+        # Masque de bits (bit p = hauteur MIDI p) pour les tests d'ensemble en O(1)
+        mask = 0
+        for p in self.pitches:
+            mask |= 1 << p
+        self.pitch_mask = mask
+        # Chaîne d'affichage précalculée : l'événement est immuable, autant ne
+        # la construire qu'une fois plutôt qu'à chaque rafraîchissement.
+        if event_type == 'chord':
+            self.display = "Accord(" + " + ".join(FRENCH_BY_MIDI[p] for p in self.pitches) + ")"
+        else:
+            self.display = FRENCH_BY_MIDI[self.pitches[0]]
+        MusicEvent._shared_content[key] = (self.pitches, self.pitch_mask,
+                                           self.display)
 
     def __repr__(self):
         pitch_names = ", ".join(midi_to_french(p) for p in self.pitches)
@@ -33,12 +76,36 @@ class MusicEvent:
 # Global state variables (will be initialized in main)
 events = []
 current_event_idx = 0
-currently_pressed = set()
-pending_chord_notes = set()
-chord_start_time = None
-CHORD_WINDOW = 0.5
+currently_pressed = 0  # bitmask : bit p levé si la hauteur MIDI p est enfoncée
+chord_start_ns = None
+CHORD_WINDOW = 0.5  # secondes, pour les messages
+# Fenêtre en nanosecondes entiers : comparée aux écarts de time.monotonic_ns(),
+# insensible aux sauts d'horloge (NTP) contrairement à time.time().
+CHORD_WINDOW_NS = int(CHORD_WINDOW * 1e9)
 notes_should_be_held = {}
-
+# Préfixes de statut internés une fois pour la boucle chaude (évite de
+# reconstruire les fragments constants à chaque message MIDI)
+OK_PREFIX = "✓ OK "
+ERR_PREFIX = "✗ ERREUR : "
+# Lignes « OK » complètes par hauteur : sur le chemin chaud, valider une note
+# revient à indexer ce tuple, sans aucune concaténation.
+OK_LINES = tuple(OK_PREFIX + name + "\n" for name in FRENCH_BY_MIDI)
+# Vues struct-of-arrays sur `events` (construites dans main après la fusion) :
+# les recherches numériques (position temporelle, mesures...) travaillent sur
+# ces tableaux contigus au lieu de parcourir les objets Python.
+event_offsets = np.empty(0)
+event_durations = np.empty(0)
+event_measures = np.empty(0, dtype=np.int32)
+
+
+def _stdin_reader(cmd_q):
+    """Lit les commandes clavier en arrière-plan (thread démon).
+
+    Bloqué sur stdin : la boucle principale n'a plus à sonder le terminal,
+    elle attend simplement sur la file des commandes.
+    """
+    for line in sys.stdin:
+        cmd_q.put(line.strip().lower())
 
 def merge_events(events):
     """Merge events at the same offset into single events.
@@ -47,16 +114,23 @@ def merge_events(events):
     one chord event, and deduplicates pitches that appear in multiple voices
     by keeping the maximum duration.
     """
-    events = sorted(events, key=lambda e: e.offset)
+    # Tri stable via NumPy : argsort en C sur un tableau de flottants, au
+    # lieu de list.sort avec un rappel Python par comparaison. Les bornes des
+    # groupes de même offset sont ensuite détectées en une passe vectorisée
+    # (un écart > 1e-9 entre offsets triés ouvre un nouveau groupe), ce qui
+    # supprime la comparaison Python par paire d'événements.
+    if len(events) > 1:
+        offsets = np.fromiter((e.offset for e in events),
+                              dtype=np.float64, count=len(events))
+        order = np.argsort(offsets, kind='stable')
+        events = [events[i] for i in order]
+        bounds = np.flatnonzero(np.diff(offsets[order]) > 1e-9) + 1
+        run_edges = [0, *bounds.tolist(), len(events)]
+    else:
+        run_edges = [0, len(events)] if events else [0]
     merged_events = []
-    i = 0
-    while i < len(events):
-        current = events[i]
-        same_offset_events = [current]
-        j = i + 1
-        while j < len(events) and abs(float(events[j].offset - current.offset)) < 1e-9:
-            same_offset_events.append(events[j])
-            j += 1
+    for i, j in zip(run_edges, run_edges[1:]):
+        same_offset_events = events[i:j]
 
         pitch_to_max_duration = {}
         for event in same_offset_events:
@@ -76,41 +150,157 @@ def merge_events(events):
         else:
             merged_events.append(MusicEvent('chord', all_pitches, max_duration,
                                            first_event.offset, first_event.measure))
-        i = j
     return merged_events
 
-def should_note_be_held(pitch, current_idx):
-    """Détermine si une note devrait encore être tenue basé sur les événements précédents."""
-    # Chercher la dernière occurrence de cette note avant l'événement actuel
-    last_occurrence_idx = None
-    for i in range(current_idx - 1, -1, -1):  # Recherche en arrière
-        event = events[i]
-        if pitch in event.pitches:
-            last_occurrence_idx = i
-            break  # On s'arrête à la première occurrence trouvée (la plus récente)
-
-    if last_occurrence_idx is None:
-        return False  # Cette note n'a jamais été jouée avant
-
-    # Vérifier si la dernière occurrence se chevauche avec l'événement actuel
-    last_event = events[last_occurrence_idx]
-    if current_idx < len(events):
-        current_event = events[current_idx]
-        current_offset = float(current_event.offset)
-        note_end_offset = float(last_event.offset + last_event.duration)
-        last_offset = float(last_event.offset)
-
-        # Si les deux événements commencent au même moment, pas de warning
-        # (cela représente la même note dans différentes voix/durées en notation musicale)
-        # Utiliser une petite tolérance pour les comparaisons flottantes
-        if abs(last_offset - current_offset) < 1e-9:
-            return False
-
-        # Une note doit être tenue si elle se termine strictement après le début de l'événement suivant
-        # Utiliser une tolérance pour éviter les problèmes d'arrondissement
-        return note_end_offset > current_offset + 1e-9
+def _part_events(part):
+    """Génère les événements d'une partie, par offset croissant.
 
-    return False
+    La partie n'est aplatie qu'une seule fois : flatten() reconstruit un
+    Stream complet, donc le résultat est conservé pour toute la passe.
+    """
+    flat_part = part.flatten()
+    # .notes exclut les silences directement dans l'itérateur music21 :
+    # inutile de les remonter en Python pour les filtrer ensuite.
+    for el in flat_part.notes:
+        # .isNote / .isChord sont des drapeaux précalculés par music21,
+        # bien moins chers que deux isinstance par élément.
+        # Coercition en float natif dès l'extraction : music21 renvoie des
+        # Fraction/OffsetQL dont l'arithmétique est bien plus lente, et tout
+        # le code aval (tri, fusion, balayage) compare ces valeurs en boucle.
+        if el.isNote:
+            yield MusicEvent('note', [el.pitch.midi],
+                             float(el.duration.quarterLength),
+                             float(el.offset), el.measureNumber or 0)
+        elif el.isChord:
+            pitches = [p.midi for p in el.pitches]
+            yield MusicEvent('chord', pitches,
+                             float(el.duration.quarterLength),
+                             float(el.offset), el.measureNumber or 0)
+
+def extract_events(parts):
+    """Extrait les événements musicaux des parties, en ordre temporel.
+
+    Les générateurs par partie alimentent directement heapq.merge : une seule
+    passe en flux, sans listes intermédiaires par partie ni retri global
+    (chaque flux est déjà ordonné par offset). Cas d'une seule partie
+    (--hand right/left, l'usage courant en travail) : le flux est déjà
+    trié, on le matérialise sans passer par la fusion ni son rappel key.
+    """
+    if len(parts) == 1:
+        return list(_part_events(parts[0]))
+    return list(heapq.merge(*(_part_events(p) for p in parts),
+                            key=lambda e: e.offset))
+
+def build_event_arrays(events):
+    """Construit les tableaux NumPy parallèles (offsets, durées, mesures).
+
+    Complément struct-of-arrays de la liste d'événements : permet les
+    recherches binaires et les agrégations en C plutôt qu'en Python.
+    """
+    n = len(events)
+    offsets = np.fromiter((e.offset for e in events), dtype=np.float64, count=n)
+    durations = np.fromiter((e.duration for e in events), dtype=np.float64, count=n)
+    measures = np.fromiter((e.measure for e in events), dtype=np.int32, count=n)
+    return offsets, durations, measures
+
+def event_at_time(t, offsets):
+    """Retourne l'indice de l'événement actif au temps t (en quarter notes).
+
+    Recherche binaire C (np.searchsorted) sur le tableau trié des offsets ;
+    retourne -1 si t précède le premier événement.
+    """
+    return int(np.searchsorted(offsets, t, side='right')) - 1
+
+def iter_mask_pitches(mask):
+    """Itère les hauteurs MIDI présentes dans un masque de bits (bit de poids faible d'abord)."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+def build_measure_index(events):
+    """Construit l'index mesure -> indice du premier événement de la mesure.
+
+    Rend le saut `j<numéro>` O(1) au lieu d'un parcours linéaire de tous les
+    événements à chaque commande.
+    """
+    measure_first = {}
+    for idx, event in enumerate(events):
+        measure_first.setdefault(event.measure, idx)
+    return measure_first
+
+def build_pitch_measure_index(events):
+    """Construit le bitmap mesure-par-hauteur : bit m du mot p levé si la
+    hauteur MIDI p apparaît dans la mesure m.
+
+    128 entiers Python au total : « où apparaît cette hauteur ? » se décode
+    en itérant les bits, sans reparcourir les événements. Sert à situer les
+    fausses notes dans la partition.
+    """
+    index = [0] * 128
+    for event in events:
+        bit = 1 << event.measure
+        for p in event.pitches:
+            index[p] |= bit
+    return index
+
+def measures_for_pitch(pitch, pitch_measures):
+    """Liste croissante des mesures où la hauteur apparaît.
+
+    Décodage des bits du mot précalculé (iter_mask_pitches itère les bits
+    levés d'un masque quelconque, ici des numéros de mesure).
+    """
+    return list(iter_mask_pitches(pitch_measures[pitch]))
+
+def compute_held_masks(events):
+    """Précalcule pour chaque événement le masque des notes qui doivent être tenues.
+
+    Balayage unique en ordre temporel : pour l'événement i, le bit p est levé
+    ssi l'occurrence la plus récente de la hauteur p avant i commence à un
+    offset strictement antérieur et se termine strictement après le début de
+    l'événement i (mêmes tolérances flottantes que l'ancienne recherche).
+    """
+    held_masks = [0] * len(events)
+    last_end = [0.0] * 128  # fin de l'occurrence la plus récente, par hauteur
+    active_mask = 0   # notes des groupes d'offsets précédents, potentiellement tenues
+    pending_mask = 0  # notes du groupe d'offset courant (pas de warning entre elles)
+    group_offset = None
+    for i, event in enumerate(events):
+        offset = event.offset
+        if group_offset is None or offset - group_offset > 1e-9:
+            # Nouveau groupe d'offset : les notes du groupe précédent deviennent actives
+            active_mask |= pending_mask
+            pending_mask = 0
+            group_offset = offset
+        # Élaguer les notes dont l'occurrence la plus récente est déjà terminée
+        m = active_mask
+        while m:
+            b = m & -m
+            if last_end[b.bit_length() - 1] <= offset + 1e-9:
+                active_mask &= ~b
+            m ^= b
+        held_masks[i] = active_mask
+        end = event.end
+        for p in event.pitches:
+            last_end[p] = end
+            pending_mask |= 1 << p
+            # Une re-frappe remplace la tenue de l'occurrence précédente
+            active_mask &= ~(1 << p)
+    return held_masks
+
+# Cache du précalcul, invalidé quand la liste d'événements change
+_held_masks_for = None
+_held_masks = []
+
+def should_note_be_held(pitch, current_idx, events):
+    """Détermine si une note devrait encore être tenue basé sur les événements précédents."""
+    global _held_masks_for, _held_masks
+    if _held_masks_for is not events:
+        _held_masks = compute_held_masks(events)
+        _held_masks_for = events
+    if current_idx >= len(_held_masks):
+        return False
+    return bool((_held_masks[current_idx] >> pitch) & 1)
 
 def validate_note_held(pitch):
     """Vérifie qu'une note qui devrait être tenue est toujours enfoncée."""
@@ -125,24 +315,163 @@ def validate_note_held(pitch):
 
 def format_event(event):
     """Formatte un événement pour l'affichage."""
-    if event.type == 'chord':
-        notes = " + ".join(midi_to_french(p) for p in event.pitches)
-        return f"Accord({notes})"
-    else:
-        return midi_to_french(event.pitches[0])
+    return event.display
+
+# Répertoire des caches d'événements (un fichier par partition + options)
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "dechiffrage")
+
+def _events_cache_path(xml_file, hand, repeats):
+    """Chemin du fichier de cache pour une partition et des options données.
+
+    La clé (chemin absolu, mtime, taille, hand, repeats) est hachée dans le
+    nom du fichier : un score modifié ou des options différentes tombent
+    naturellement sur un autre fichier, sans validation au chargement.
+    """
+    st = os.stat(xml_file)
+    key = "|".join((os.path.abspath(xml_file), str(st.st_mtime),
+                    str(st.st_size), hand, str(repeats)))
+    return os.path.join(CACHE_DIR,
+                        hashlib.sha1(key.encode()).hexdigest() + ".pkl")
 
-def check_event_completed(event):
+def load_events_cache(xml_file, hand, repeats):
+    """Charge les événements extraits depuis le cache s'il est à jour.
+
+    Retourne None si le cache est absent ou illisible ; un score modifié ou
+    d'autres options donnent un autre nom de fichier, donc un cache manqué.
+    """
+    try:
+        with open(_events_cache_path(xml_file, hand, repeats), 'rb') as f:
+            return pickle.load(f)
+    except (OSError, pickle.PickleError, EOFError, AttributeError, ValueError):
+        return None
+
+def save_events_cache(xml_file, hand, repeats, events):
+    """Écrit le cache des événements extraits (meilleur effort, jamais fatal)."""
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(_events_cache_path(xml_file, hand, repeats), 'wb') as f:
+            pickle.dump(events, f, protocol=pickle.HIGHEST_PROTOCOL)
+    except OSError:
+        pass
+
+# Correspondance pas diatonique -> demi-tons pour la conversion MusicXML -> MIDI
+_STEP_TO_SEMITONE = {'C': 0, 'D': 2, 'E': 4, 'F': 5, 'G': 7, 'A': 9, 'B': 11}
+
+def parse_musicxml_events(xml_file, hand="both"):
+    """Lit directement un MusicXML (non compressé) en liste d'événements bruts.
+
+    Parcours en flux avec xml.etree.iterparse : seules les informations dont
+    le validateur a besoin sont extraites (hauteurs, durées, offsets, numéros
+    de mesure), sans construire le graphe d'objets music21 — le chargement
+    passe de plusieurs secondes à quelques dizaines de ms sur un gros score.
+    Gère <chord/>, <backup>, <forward>, les silences et les notes d'ornement.
+    Retourne None dès que le fichier sort du sous-ensemble géré (format
+    timewise, percussions, cas exotiques) : l'appelant retombe sur music21.
+    Le résultat n'est pas trié (les voix reviennent en arrière) ; il est
+    destiné à passer par merge_events comme celui d'extract_events.
+    """
+    import xml.etree.ElementTree as ET
+
+    if hand == "right":
+        wanted = {0}
+    elif hand == "left":
+        wanted = {1}
+    else:
+        wanted = {0, 1}
+    last_wanted = max(wanted)
+
+    raw_events = []
+    part_idx = -1
+    divisions = 1
+    measure_start = 0.0
+    measure_num = 0
+    try:
+        for ev, elem in ET.iterparse(xml_file, events=("start", "end")):
+            if ev == "start":
+                if elem.tag == "score-timewise":
+                    return None
+                if elem.tag == "part":
+                    part_idx += 1
+                    divisions = 1
+                    measure_start = 0.0
+                    measure_num = 0
+                continue
+            if elem.tag == "part" and part_idx >= last_wanted:
+                # Toutes les parties demandées sont lues : inutile de
+                # parcourir le reste du fichier (ex. --hand right sur un
+                # score à plusieurs parties).
+                break
+            if elem.tag != "measure" or part_idx < 0:
+                continue
+            if part_idx not in wanted:
+                elem.clear()
+                continue
+
+            try:
+                measure_num = int(elem.get("number"))
+            except (TypeError, ValueError):
+                measure_num += 1  # numéro implicite ou non numérique
+
+            pos = 0       # position courante dans la mesure, en divisions
+            max_pos = 0   # longueur atteinte (fin de mesure)
+            prev_start = 0  # départ de la dernière note, pour <chord/>
+            for child in elem:
+                tag = child.tag
+                if tag == "attributes":
+                    d = child.findtext("divisions")
+                    if d:
+                        if pos != 0:
+                            return None  # changement de divisions en cours de mesure
+                        divisions = int(d)
+                elif tag == "backup":
+                    pos -= int(child.findtext("duration"))
+                elif tag == "forward":
+                    pos += int(child.findtext("duration"))
+                    max_pos = max(max_pos, pos)
+                elif tag == "note":
+                    if child.find("unpitched") is not None or child.find("cue") is not None:
+                        return None
+                    is_grace = child.find("grace") is not None
+                    is_chord = child.find("chord") is not None
+                    dur_text = child.findtext("duration")
+                    dur = int(dur_text) if dur_text else 0
+                    start = prev_start if is_chord else pos
+                    pitch_el = child.find("pitch")
+                    if pitch_el is not None and child.find("rest") is None:
+                        step = pitch_el.findtext("step")
+                        if step not in _STEP_TO_SEMITONE:
+                            return None
+                        octave = int(pitch_el.findtext("octave"))
+                        alter = pitch_el.findtext("alter")
+                        midi = (12 * (octave + 1) + _STEP_TO_SEMITONE[step]
+                                + (int(float(alter)) if alter else 0))
+                        if not 0 <= midi < 128:
+                            return None
+                        raw_events.append(MusicEvent(
+                            'note', [midi], dur / divisions,
+                            measure_start + start / divisions, measure_num))
+                    if not is_chord and not is_grace:
+                        prev_start = start
+                        pos += dur
+                        max_pos = max(max_pos, pos)
+            measure_start += max_pos / divisions
+            # Libérer la mesure traitée pour garder la mémoire plate
+            elem.clear()
+    except (ET.ParseError, TypeError, ValueError, OSError):
+        return None
+    if part_idx < 0:
+        return None  # aucune partie : probablement pas un MusicXML partwise
+    return raw_events
+
+def check_event_completed(event, pressed_mask):
     """Vérifie si un événement (note ou accord) est complété."""
-    if event.type == 'note':
-        # Une note simple est complétée si elle a été jouée
-        return event.pitches[0] in currently_pressed
-    else:  # chord
-        # Un accord est complété si toutes ses notes sont jouées
-        return all(p in currently_pressed for p in event.pitches)
+    # Toutes les notes de l'événement sont jouées ssi son masque est un
+    # sous-ensemble du masque des notes enfoncées : un seul ET binaire.
+    return (pressed_mask & event.pitch_mask) == event.pitch_mask
 
 def main():
     """Main function to run the MIDI validator"""
-    global events, current_event_idx, currently_pressed, pending_chord_notes, chord_start_time, notes_should_be_held
+    global events, current_event_idx, currently_pressed, chord_start_ns, notes_should_be_held
 
     parser = argparse.ArgumentParser(description="MIDI piano validator")
     parser.add_argument("xml_file", help="Path to the MusicXML file")
@@ -157,49 +486,79 @@ def main():
         action="store_true",
         help="Expand repeat signs in the score (default: disabled)",
     )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Ignore and do not write the extracted-events cache",
+    )
     args = parser.parse_args()
 
-    print("Chargement de la partition...")
-    score = converter.parse(args.xml_file)
+    import mido
+
+    # Le parsing music21 domine le démarrage : les événements extraits sont
+    # mis en cache à côté de la partition et rechargés tant que le fichier
+    # XML et les options n'ont pas changé.
+    events = None
+    if not args.no_cache:
+        events = load_events_cache(args.xml_file, args.hand, args.repeats)
+
+    if events is None:
+        print("Chargement de la partition...")
+        raw_events = None
+        # Lecture MusicXML directe (sans music21) quand c'est possible ;
+        # l'expansion des répétitions nécessite music21.
+        if not args.repeats and args.xml_file.lower().endswith(('.xml', '.musicxml')):
+            raw_events = parse_musicxml_events(args.xml_file, args.hand)
+
+        if raw_events is None:
+            from music21 import converter
+
+            # Pour les extensions MusicXML connues, forcer le format évite la
+            # détection (sniffing) et le passage par le registre des convertisseurs.
+            if args.xml_file.lower().endswith(('.xml', '.musicxml', '.mxl')):
+                score = converter.parse(args.xml_file, format='musicxml')
+            else:
+                score = converter.parse(args.xml_file)
+
+            # Expand repeats if requested
+            if args.repeats:
+                print("Expansion des répétitions...")
+                score = score.expandRepeats()
+
+            # Parts: index 0 = right hand, index 1 = left hand (standard grand staff)
+            if args.hand == "right":
+                parts = [score.parts[0]]
+            elif args.hand == "left":
+                parts = [score.parts[1]]
+            else:
+                parts = list(score.parts[:2])
+
+            # Extraire les événements musicaux dans l'ordre temporel
+            raw_events = extract_events(parts)
 
-    # Expand repeats if requested
-    if args.repeats:
-        print("Expansion des répétitions...")
-        score = score.expandRepeats()
+        events = merge_events(raw_events)
 
-    # Parts: index 0 = right hand, index 1 = left hand (standard grand staff)
-    if args.hand == "right":
-        parts = [score.parts[0]]
-    elif args.hand == "left":
-        parts = [score.parts[1]]
+        if not args.no_cache:
+            save_events_cache(args.xml_file, args.hand, args.repeats, events)
     else:
-        parts = list(score.parts[:2])
-
-    # Extraire les événements musicaux dans l'ordre temporel
-    events = []
-    for part in parts:
-        # Utiliser flatten() pour obtenir les offsets absolus
-        flat_part = part.flatten()
-        for el in flat_part.notesAndRests:
-            if isinstance(el, note.Note):
-                # Utiliser l'offset absolu de l'élément dans la partie aplatie
-                events.append(MusicEvent('note', [el.pitch.midi],
-                                       el.duration.quarterLength,
-                                       el.offset, el.measureNumber if hasattr(el, 'measureNumber') else 0))
-            elif isinstance(el, chord.Chord):
-                pitches = [p.midi for p in el.pitches]
-                events.append(MusicEvent('chord', pitches,
-                                       el.duration.quarterLength,
-                                       el.offset, el.measureNumber if hasattr(el, 'measureNumber') else 0))
-
-    # Trier par offset (ordre temporel) - les offsets sont maintenant absolus
-    events.sort(key=lambda e: e.offset)
-
-    events = merge_events(events)
+        print("Partition chargée depuis le cache.")
+
+    global event_offsets, event_durations, event_measures
+    event_offsets, event_durations, event_measures = build_event_arrays(events)
+
+    # Index des mesures pour les sauts O(1)
+    measure_first = build_measure_index(events)
+
+    # Bitmap mesure-par-hauteur pour situer les fausses notes
+    pitch_measures = build_pitch_measure_index(events)
+
+    # Masques des notes à tenir, précalculés une fois pour toute la partition
+    held_masks = compute_held_masks(events)
 
     print(f"{len(events)} événements musicaux détectés (notes et accords).")
     if events:
-        measures_count = max(e.measure for e in events)
+        # max() C-level sur le tableau SoA, sans repasser sur les objets
+        measures_count = int(event_measures.max())
         print(f"{measures_count} mesures couvrant ces événements.")
     print("Ouverture du port MIDI...")
 
@@ -218,15 +577,19 @@ def main():
 
     # État de validation
     current_event_idx = 0
-    currently_pressed = set()  # Notes actuellement enfoncées (MIDI pitches)
-    pending_chord_notes = set()  # Notes attendues pour compléter un accord
-    chord_start_time = None  # Temps de début pour détecter un accord
+    currently_pressed = 0  # Bitmask des notes actuellement enfoncées (MIDI pitches)
+    chord_start_ns = None  # Début de la fenêtre d'accord (monotonic_ns)
 
     # Pour le suivi des notes tenues
     notes_should_be_held = {}  # {pitch: event_idx} - notes qui devraient être tenues
 
     try:
-        with mido.open_input(ports[port_index]) as port:
+        # File d'entrée unique : le rappel rtmidi (thread C du backend) y
+        # pousse les messages MIDI, le thread stdin les commandes clavier
+        # (chaînes). La boucle principale bloque dessus au lieu de sonder :
+        # réveil immédiat quand quelque chose arrive, zéro CPU au repos.
+        in_q = queue.SimpleQueue()
+        with mido.open_input(ports[port_index], callback=in_q.put) as port:
             if not events:
                 print("Aucun événement musical dans la partition.")
             else:
@@ -235,17 +598,33 @@ def main():
                 print(f"Attendu: {format_event(current_event)}")
                 print("Écoute en cours... (Ctrl+C, tapez 'q' pour quitter, ou 'j<numéro>' pour sauter à une mesure)\n")
 
+            threading.Thread(target=_stdin_reader, args=(in_q,),
+                             daemon=True).start()
+
             running = True
             while running:
                 if current_event_idx >= len(events):
                     print("🎉 Pièce terminée.")
                     break
 
-                ready, _, _ = select.select([sys.stdin], [], [], 0)
-                if ready:
-                    command = sys.stdin.readline().strip().lower()
+                # Attente bloquante du premier élément, puis vidage de tout
+                # ce qui est déjà arrivé : le reste du tour traite le lot.
+                batch = [in_q.get()]
+                try:
+                    while True:
+                        batch.append(in_q.get_nowait())
+                except queue.Empty:
+                    pass
+
+                pending_msgs = []
+                for item in batch:
+                    if not isinstance(item, str):
+                        pending_msgs.append(item)
+                        continue
+                    command = item
                     if command in {"q", "quit"}:
                         print("\nArrêt de l'écoute.")
+                        running = False
                         break
                     elif command.startswith("j"):
                         # Commande de saut vers une mesure spécifique
@@ -254,115 +633,131 @@ def main():
                             bar_str = command[1:].strip()
                             if bar_str:
                                 target_bar = int(bar_str)
-                                # Trouver le premier événement de cette mesure
-                                found = False
-                                for idx, event in enumerate(events):
-                                    if event.measure == target_bar:
-                                        current_event_idx = idx
-                                        current_event = events[current_event_idx]
-                                        currently_pressed.clear()
-                                        chord_start_time = None
-                                        pending_chord_notes = set()
-                                        print(f"\n⏭  Saut vers mesure {target_bar}")
-                                        print(f"Mesure {current_event.measure} / {measures_count}")
-                                        print(f"Attendu: {format_event(current_event)}\n")
-                                        found = True
-                                        break
-                                if not found:
+                                # Premier événement de cette mesure : lookup O(1)
+                                idx = measure_first.get(target_bar)
+                                if idx is not None:
+                                    current_event_idx = idx
+                                    current_event = events[current_event_idx]
+                                    currently_pressed = 0
+                                    chord_start_ns = None
+                                    print(f"\n⏭  Saut vers mesure {target_bar}")
+                                    print(f"Mesure {current_event.measure} / {measures_count}")
+                                    print(f"Attendu: {format_event(current_event)}\n")
+                                else:
                                     print(f"✗ Mesure {target_bar} introuvable (valide: 1-{measures_count})")
                             else:
                                 print("✗ Usage: j<numéro> (exemple: j12 pour aller à la mesure 12)")
                         except ValueError:
                             print("✗ Numéro de mesure invalide. Usage: j<numéro> (exemple: j12)")
+                if not running:
+                    break
 
-                for msg in port.iter_pending():
-                    if msg.type == 'note_on' and msg.velocity > 0:
-                        # Note enfoncée
-                        pitch = msg.note
-                        current_event = events[current_event_idx]
-
-                        # Vérifier si la note fait partie de l'événement attendu
-                        if pitch not in current_event.pitches:
-                            # Note inattendue
-                            print(f"✗ ERREUR : {midi_to_french(pitch)} inattendu")
-                            print(f"  Attendu: {format_event(current_event)}")
-                            continue
-
-                        # Ajouter la note aux notes actuellement enfoncées
-                        currently_pressed.add(pitch)
-                        print(f"✓ OK {midi_to_french(pitch)}")
+                # Sortie accumulée pour tout le lot : une seule écriture (et
+                # un seul flush) vers le terminal au lieu d'une par message.
+                # Les transitions enfoncé/relâché sont en revanche appliquées
+                # dans l'ordre d'arrivée : les transports qui livrent en
+                # rafale (BLE MIDI) mettent couramment la paire on/off d'une
+                # même touche dans un seul lot, et fusionner les relâchements
+                # hors ordre laisserait un bit fantôme dans currently_pressed.
+                out = []
+                for msg in pending_msgs:
+                    if msg.type == 'note_off' or (msg.type == 'note_on' and msg.velocity == 0):
+                        # Note relâchée
+                        # (Pour l'instant, on ne valide pas strictement la durée des notes)
+                        currently_pressed &= ~(1 << msg.note)
+                        continue
+                    if msg.type != 'note_on':
+                        continue
+
+                    # Note enfoncée
+                    pitch = msg.note
+                    current_event = events[current_event_idx]
+
+                    # Re-déclenchement (touche maintenue, pédale, contrôleur
+                    # bavard) d'une note attendue et déjà enfoncée : rien à
+                    # refaire, on ignore sans réafficher de feedback. Une
+                    # vraie re-frappe (note répétée de la partition) n'est pas
+                    # concernée : son note_off, même arrivé dans le même lot,
+                    # a déjà baissé le bit puisque les messages sont traités
+                    # dans l'ordre d'arrivée.
+                    if (currently_pressed >> pitch) & 1 and \
+                            (current_event.pitch_mask >> pitch) & 1:
+                        continue
+
+                    # Vérifier si la note fait partie de l'événement attendu
+                    # (test de bit O(1) sur le masque précalculé)
+                    if not (current_event.pitch_mask >> pitch) & 1:
+                        # Note inattendue (une seule écriture, préfixe interné),
+                        # avec les mesures où cette hauteur apparaît vraiment
+                        ms = measures_for_pitch(pitch, pitch_measures)
+                        if ms:
+                            shown = ", ".join(map(str, ms[:6]))
+                            hint = f" (présent aux mesures {shown}" + (
+                                ", ...)" if len(ms) > 6 else ")")
+                        else:
+                            hint = ""
+                        out.append(ERR_PREFIX + midi_to_french(pitch)
+                                   + " inattendu" + hint + "\n  Attendu: "
+                                   + current_event.display + "\n")
+                        continue
+
+                    # Ajouter la note aux notes actuellement enfoncées
+                    currently_pressed |= 1 << pitch
+                    out.append(OK_LINES[pitch])
+
+                    # Pour les accords, initialiser la fenêtre temporelle au premier note
+                    if current_event.type == 'chord' and chord_start_ns is None:
+                        chord_start_ns = time.monotonic_ns()
+
+                    # Vérifier si l'événement est complété
+                    if check_event_completed(current_event, currently_pressed):
+                        # Avant de valider, vérifier que les notes qui doivent être
+                        # tenues le sont : une différence de masques précalculés
+                        # remplace le parcours de tous les événements précédents.
+                        # Le cas courant (aucune note à tenir ici) est tranché
+                        # par le seul test de vérité du masque précalculé.
+                        held_mask = held_masks[current_event_idx]
+                        if held_mask and (missing_mask := held_mask & ~currently_pressed):
+                            note_names = ", ".join(midi_to_french(p)
+                                                   for p in iter_mask_pitches(missing_mask))
+                            out.append(f"⚠ AVERTISSEMENT : Notes devraient être tenues : {note_names}\n")
 
-                        # Pour les accords, initialiser la fenêtre temporelle au premier note
                         if current_event.type == 'chord':
-                            if chord_start_time is None:
-                                chord_start_time = time.time()
-                                pending_chord_notes = set(current_event.pitches) - {pitch}
-                            else:
-                                pending_chord_notes.discard(pitch)
-
-                        # Vérifier si l'événement est complété
-                        if check_event_completed(current_event):
-                            # Avant de valider, vérifier que les notes qui doivent être tenues le sont
-                            missing_held_notes = []
-                            if current_event_idx > 0:  # Il y a des événements précédents
-                                # Collecter tous les pitches uniques des événements précédents
-                                checked_pitches = set()
-                                for prev_idx in range(current_event_idx):
-                                    prev_event = events[prev_idx]
-                                    for prev_pitch in prev_event.pitches:
-                                        # Ne vérifier chaque pitch qu'une seule fois
-                                        if prev_pitch not in checked_pitches:
-                                            checked_pitches.add(prev_pitch)
-                                            if should_note_be_held(prev_pitch, current_event_idx):
-                                                if prev_pitch not in currently_pressed:
-                                                    missing_held_notes.append(prev_pitch)
-
-                            if missing_held_notes:
-                                note_names = ", ".join(midi_to_french(p) for p in missing_held_notes)
-                                print(f"⚠ AVERTISSEMENT : Notes devraient être tenues : {note_names}")
-
-                            if current_event.type == 'chord':
-                                elapsed = time.time() - chord_start_time if chord_start_time else 0
-                                if elapsed <= CHORD_WINDOW:
-                                    print(f"✅ {format_event(current_event)} validé.\n")
-                                    prev_measure = current_event.measure
-                                    current_event_idx += 1
-                                    chord_start_time = None
-                                    pending_chord_notes = set()
-
-                                    if current_event_idx < len(events):
-                                        current_event = events[current_event_idx]
-                                        # Afficher la mesure seulement si elle a changé
-                                        if current_event.measure != prev_measure:
-                                            print(f"Mesure {current_event.measure} / {measures_count}")
-                                        print(f"Attendu: {format_event(current_event)}")
-                                else:
-                                    print(f"✗ ERREUR : Accord trop lent (>{CHORD_WINDOW}s)")
-                                    # Réinitialiser pour réessayer
-                                    chord_start_time = None
-                                    pending_chord_notes = set(current_event.pitches)
-                                    currently_pressed.clear()
-                            else:  # note simple
-                                print(f"✅ {format_event(current_event)} validé.\n")
+                            elapsed_ns = (time.monotonic_ns() - chord_start_ns
+                                          if chord_start_ns else 0)
+                            if elapsed_ns <= CHORD_WINDOW_NS:
+                                out.append(f"✅ {format_event(current_event)} validé.\n\n")
                                 prev_measure = current_event.measure
                                 current_event_idx += 1
+                                chord_start_ns = None
 
                                 if current_event_idx < len(events):
                                     current_event = events[current_event_idx]
                                     # Afficher la mesure seulement si elle a changé
                                     if current_event.measure != prev_measure:
-                                        print(f"Mesure {current_event.measure} / {measures_count}")
-                                    print(f"Attendu: {format_event(current_event)}")
-
-                    elif msg.type == 'note_off' or (msg.type == 'note_on' and msg.velocity == 0):
-                        # Note relâchée
-                        pitch = msg.note
-                        currently_pressed.discard(pitch)
-
-                        # Vérifier si une note qui devrait être tenue a été relâchée prématurément
-                        # (Pour l'instant, on ne valide pas strictement la durée des notes)
+                                        out.append(f"Mesure {current_event.measure} / {measures_count}\n")
+                                    out.append(f"Attendu: {format_event(current_event)}\n")
+                            else:
+                                out.append(f"✗ ERREUR : Accord trop lent (>{CHORD_WINDOW}s)\n")
+                                # Réinitialiser pour réessayer
+                                chord_start_ns = None
+                                currently_pressed = 0
+                        else:  # note simple
+                            out.append(f"✅ {format_event(current_event)} validé.\n\n")
+                            prev_measure = current_event.measure
+                            current_event_idx += 1
+
+                            if current_event_idx < len(events):
+                                current_event = events[current_event_idx]
+                                # Afficher la mesure seulement si elle a changé
+                                if current_event.measure != prev_measure:
+                                    out.append(f"Mesure {current_event.measure} / {measures_count}\n")
+                                out.append(f"Attendu: {format_event(current_event)}\n")
+
+                if out:
+                    sys.stdout.write("".join(out))
+                    sys.stdout.flush()
 
-                time.sleep(0.01)
     except KeyboardInterrupt:
         print("\n\nArrêt de l'écoute.")
         sys.exit(0)